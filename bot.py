@@ -2,26 +2,98 @@ import os
 import logging
 import sys
 from typing import List
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from functools import lru_cache
 
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.constants import ParseMode
+from telegram.error import BadRequest
+from telegram.request import HTTPXRequest
 from telegram.ext import (
+    AIORateLimiter,
     Application,
     CommandHandler,
     CallbackQueryHandler,
     CallbackContext,
+    Defaults,
     MessageHandler,
     filters
 )
 
-# Configure logging
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Load .env only for local development - on Render the environment is
+# already populated and the import plus filesystem walk is skipped
+if not os.environ.get('TELEGRAM_BOT_TOKEN'):
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass
+
+# Configure logging - LOG_LEVEL env var overrides without a code change
 logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO,
+    level=os.environ.get('LOG_LEVEL', 'INFO').upper(),
     stream=sys.stdout
 )
+# httpx and PTB log every request/update at INFO - too chatty under load
+logging.getLogger('httpx').setLevel(logging.WARNING)
+logging.getLogger('telegram').setLevel(logging.WARNING)
 logger = logging.getLogger(__name__)
 
+# Compact callback payloads - Telegram requires strings, and single
+# characters are the cheapest to send, hash and dispatch on
+CB_BLOCKCHAIN = "0"
+CB_CRYPTO = "1"
+CB_SECURITY = "2"
+CB_STARTED = "3"
+CB_ALL_TOPICS = "a"
+
+# Topic callbacks in the same order as CryptoEducation.topics
+TOPIC_CALLBACKS = (CB_BLOCKCHAIN, CB_CRYPTO, CB_SECURITY, CB_STARTED)
+
+# Static keyboards - built once at import time and shared by every handler
+MAIN_MENU_KEYBOARD = (
+    (InlineKeyboardButton("🔗 Blockchain", callback_data=CB_BLOCKCHAIN),
+     InlineKeyboardButton("💰 Cryptocurrency", callback_data=CB_CRYPTO)),
+    (InlineKeyboardButton("🔒 Security", callback_data=CB_SECURITY),
+     InlineKeyboardButton("🌱 Getting Started", callback_data=CB_STARTED))
+)
+
+MAIN_MENU_MARKUP = InlineKeyboardMarkup(MAIN_MENU_KEYBOARD)
+
+TOPIC_MENU_MARKUP = InlineKeyboardMarkup(
+    MAIN_MENU_KEYBOARD +
+    ((InlineKeyboardButton("📚 All Topics", callback_data=CB_ALL_TOPICS),),)
+)
+
+# The only update types this bot handles - anything else is wasted traffic
+ALLOWED_UPDATES = [Update.MESSAGE, Update.CALLBACK_QUERY]
+
+HELP_MESSAGE = """
+🤖 **Crypto Education Bot Commands**
+
+/start - Welcome message with topic buttons
+/topics - List all educational topics
+/help - This help message
+
+💡 Use the interactive buttons below to explore different crypto topics!
+"""
+
+class ORJSONRequest(HTTPXRequest):
+    """HTTPXRequest that decodes Bot API responses with orjson."""
+
+    def parse_json_payload(self, payload: bytes) -> dict:
+        return orjson.loads(payload)
+
+
+# Pick the fastest available JSON decoder for Bot API traffic
+RequestClass = ORJSONRequest if orjson is not None else HTTPXRequest
+
 # Bot Configuration
 class BotConfig:
     # Get token from environment variable
@@ -29,18 +101,27 @@ class BotConfig:
     
     # Webhook configuration for Render
     WEBHOOK_URL = os.environ.get('RENDER_EXTERNAL_URL', '')  # Render provides this
+    WEBHOOK_SECRET = os.environ.get('WEBHOOK_SECRET', 'WEBHOOK_SECRET')
     PORT = int(os.environ.get('PORT', 8443))
+
+    # Telegram rejects messages longer than this outright
+    MAX_MESSAGE_LENGTH = 4096
     
     if not TOKEN:
         logger.error("TELEGRAM_BOT_TOKEN not set!")
         sys.exit(1)
 
 # Crypto Education Content
-@dataclass
+@dataclass(frozen=True, slots=True)
 class CryptoTopic:
     title: str
     description: str
     icon: str
+    # Truncated description for the /topics listing, sliced once here
+    summary: str = field(init=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, 'summary', f"{self.description[:100]}...")
 
 class CryptoEducation:
     def __init__(self):
@@ -51,8 +132,8 @@ class CryptoEducation:
 Welcome to a safe, educational space to learn about cryptocurrency fundamentals.
 """
         
-        self.topics = [
-            CryptoTopic("🔗 What is Blockchain?", 
+        self.topics = (
+            CryptoTopic("🔗 What is Blockchain?",
                        "Blockchain is a decentralized, distributed ledger technology that records transactions across many computers. It ensures security, transparency, and immutability of data without central authority.", 
                        "🔗"),
             
@@ -64,24 +145,63 @@ Welcome to a safe, educational space to learn about cryptocurrency fundamentals.
                        "Learn essential security practices: Use hardware wallets, enable 2FA, never share private keys, verify addresses, and beware of phishing scams. Your keys, your crypto!", 
                        "🔒"),
             
-            CryptoTopic("🌱 Getting Started Safely", 
-                       "Start with research, understand risks, begin with small amounts, use reputable exchanges, and never invest more than you can afford to lose. Education first!", 
+            CryptoTopic("🌱 Getting Started Safely",
+                       "Start with research, understand risks, begin with small amounts, use reputable exchanges, and never invest more than you can afford to lose. Education first!",
                        "🌱")
-        ]
+        )
+
+        # Pre-render the static topic listings once so handlers never
+        # rebuild the same strings per request
+        self.topics_message = "📚 **Available Crypto Education Topics**\n\n" + "".join(
+            f"{topic.icon} **{i}. {topic.title}**\n   {topic.summary}\n\n"
+            for i, topic in enumerate(self.topics, 1)
+        )
+
+        self.all_topics_message = "📚 **Complete Crypto Education Topics**\n\n" + "".join(
+            f"{topic.icon} **{topic.title}**\n{topic.description}\n\n"
+            for topic in self.topics
+        )
+
+        # Per-topic detail screens, fully rendered once so a button press
+        # is just a dict lookup; takeaways are ordered like self.topics
+        takeaways = (
+            "• Decentralized ledger\n• Immutable records\n• No central authority\n• Transparent transactions",
+            "• Digital currency\n• Peer-to-peer transactions\n• Cryptography for security\n• Limited supply",
+            "• Hardware wallets recommended\n• Never share private keys\n• Enable 2FA\n• Verify all transactions",
+            "• Research before investing\n• Start small\n• Use reputable platforms\n• Understand the risks"
+        )
+
+        self.detail_messages = {}
+        for callback_data, topic, points in zip(TOPIC_CALLBACKS, self.topics, takeaways):
+            self.detail_messages[callback_data] = (
+                f"**{topic.icon} {topic.title}**\n\n{topic.description}\n\n"
+                f"💡 *Key Takeaways:*\n{points}"
+            )
+
+# Content is fully static, so one shared instance and one dispatch table
+# serve the whole process
+EDUCATION = CryptoEducation()
+
+CALLBACK_VIEWS = {
+    data: (text, TOPIC_MENU_MARKUP)
+    for data, text in EDUCATION.detail_messages.items()
+}
+CALLBACK_VIEWS[CB_ALL_TOPICS] = (EDUCATION.all_topics_message, MAIN_MENU_MARKUP)
+
+
+async def _post_init(application: Application) -> None:
+    """Warm the HTTP pool and prefetch bot identity before the first update."""
+    me = await application.bot.get_me()
+    logger.info(f"Connected to Telegram as @{me.username}")
+
 
 class CryptoEduBot:
     def __init__(self):
-        self.config = BotConfig()
-        self.education = CryptoEducation()
-        logger.info("Crypto Education Bot initialized")
-    
-    async def start(self, update: Update, context: CallbackContext) -> None:
-        """Handle /start command."""
-        user = update.effective_user
-        
-        welcome_message = f"""
-🎓 Welcome {user.first_name} to Crypto Education Bot! 🎓
+        self.config = BotConfig
+        self.education = EDUCATION
 
+        # Everything after the greeting line is identical for every user
+        self._welcome_static = f"""
 {self.education.description}
 
 📖 *Choose a topic to learn:*
@@ -95,172 +215,222 @@ class CryptoEduBot:
 /topics - List all topics
 /help - Show all commands
         """
-        
-        keyboard = [
-            [InlineKeyboardButton("🔗 Blockchain", callback_data="blockchain"),
-             InlineKeyboardButton("💰 Cryptocurrency", callback_data="crypto")],
-            [InlineKeyboardButton("🔒 Security", callback_data="security"),
-             InlineKeyboardButton("🌱 Getting Started", callback_data="started")]
-        ]
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await update.message.reply_text(
-            welcome_message,
-            reply_markup=reply_markup,
-            parse_mode='Markdown'
+
+        # Callback dispatch table shared at module level: data -> (text, markup)
+        self._views = CALLBACK_VIEWS
+
+        # Single frozen template with one placeholder for the user's name
+        self._welcome_template = (
+            "\n🎓 Welcome {first_name} to Crypto Education Bot! 🎓\n"
+            + self._welcome_static
         )
-    
+
+        # Welcome screens differ only by first name - memoize per name
+        self._render_welcome = lru_cache(maxsize=256)(self._build_welcome)
+
+        logger.info("Crypto Education Bot initialized")
+
+    def _build_welcome(self, first_name: str) -> str:
+        """Render the welcome message for one first name (cached via lru_cache)."""
+        return self._welcome_template.format_map({'first_name': first_name})
+
+    @staticmethod
+    def _hard_wrap(paragraph: str) -> List[str]:
+        """Wrap a single oversize paragraph on line breaks, then by length."""
+        limit = BotConfig.MAX_MESSAGE_LENGTH
+        pieces = []
+        current = ""
+        for line in paragraph.split("\n"):
+            while len(line) > limit:
+                if current:
+                    pieces.append(current)
+                    current = ""
+                pieces.append(line[:limit])
+                line = line[limit:]
+            candidate = f"{current}\n{line}" if current else line
+            if len(candidate) > limit:
+                pieces.append(current)
+                current = line
+            else:
+                current = candidate
+        if current:
+            pieces.append(current)
+        return pieces
+
+    @staticmethod
+    def _split_message(text: str) -> List[str]:
+        """Split an oversize message on paragraph boundaries.
+
+        A lone paragraph longer than the limit is hard-wrapped so no chunk
+        ever exceeds what Telegram accepts.
+        """
+        chunks = []
+        current = ""
+        for paragraph in text.split("\n\n"):
+            if len(paragraph) > BotConfig.MAX_MESSAGE_LENGTH:
+                if current:
+                    chunks.append(current)
+                wrapped = CryptoEduBot._hard_wrap(paragraph)
+                chunks.extend(wrapped[:-1])
+                current = wrapped[-1]
+                continue
+            candidate = f"{current}\n\n{paragraph}" if current else paragraph
+            if len(candidate) > BotConfig.MAX_MESSAGE_LENGTH and current:
+                chunks.append(current)
+                current = paragraph
+            else:
+                current = candidate
+        if current:
+            chunks.append(current)
+        return chunks
+
+    async def _reply(self, update: Update, context: CallbackContext, text: str,
+                     reply_markup=None) -> None:
+        """Send text by editing the callback message or replying, whichever fits.
+
+        Oversize messages are split locally rather than wasting a round-trip
+        on a request Telegram would reject anyway, and edits that would not
+        change the message are skipped entirely.
+        """
+        query = update.callback_query
+        if len(text) > BotConfig.MAX_MESSAGE_LENGTH:
+            chunks = self._split_message(text)
+        else:
+            chunks = [text]
+
+        last = len(chunks) - 1
+        for i, chunk in enumerate(chunks):
+            markup = reply_markup if i == last else None
+            if query and i == 0:
+                # Re-editing a message with identical content just earns a
+                # "message is not modified" error from Telegram - skip it,
+                # keyed on the target message so edits to other messages
+                # in the same chat are never suppressed
+                message_id = query.message.message_id if query.message else None
+                edit_key = (message_id, hash(chunk))
+                if message_id is not None and context.chat_data.get('last_edit') == edit_key:
+                    return
+                try:
+                    await query.edit_message_text(chunk, reply_markup=markup)
+                except BadRequest as e:
+                    if "not modified" not in str(e).lower():
+                        raise
+                context.chat_data['last_edit'] = edit_key
+            elif query:
+                await query.message.reply_text(chunk, reply_markup=markup)
+            else:
+                await update.message.reply_text(chunk, reply_markup=markup)
+
+    async def start(self, update: Update, context: CallbackContext) -> None:
+        """Handle /start command."""
+        user = update.effective_user
+        welcome_message = self._render_welcome(user.first_name)
+
+        await self._reply(update, context, welcome_message, reply_markup=MAIN_MENU_MARKUP)
+
     async def topics(self, update: Update, context: CallbackContext) -> None:
         """Display all crypto topics."""
-        message = "📚 **Available Crypto Education Topics**\n\n"
-        
-        for i, topic in enumerate(self.education.topics, 1):
-            message += f"{topic.icon} **{i}. {topic.title}**\n"
-            message += f"   {topic.description[:100]}...\n\n"
-        
-        await update.message.reply_markdown(message)
+        await self._reply(update, context, self.education.topics_message)
     
     async def help_command(self, update: Update, context: CallbackContext) -> None:
         """Show help message."""
-        message = """
-🤖 **Crypto Education Bot Commands**
-
-/start - Welcome message with topic buttons
-/topics - List all educational topics
-/help - This help message
-
-💡 Use the interactive buttons below to explore different crypto topics!
-        """
-        
-        await update.message.reply_markdown(message)
+        await self._reply(update, context, HELP_MESSAGE)
     
     async def button_handler(self, update: Update, context: CallbackContext) -> None:
-        """Handle button callbacks."""
-        query = update.callback_query
-        await query.answer()
-        
-        if query.data == "blockchain":
-            topic = self.education.topics[0]
-            message = f"**{topic.icon} {topic.title}**\n\n{topic.description}\n\n💡 *Key Takeaways:*\n• Decentralized ledger\n• Immutable records\n• No central authority\n• Transparent transactions"
-            
-        elif query.data == "crypto":
-            topic = self.education.topics[1]
-            message = f"**{topic.icon} {topic.title}**\n\n{topic.description}\n\n💡 *Key Takeaways:*\n• Digital currency\n• Peer-to-peer transactions\n• Cryptography for security\n• Limited supply"
-            
-        elif query.data == "security":
-            topic = self.education.topics[2]
-            message = f"**{topic.icon} {topic.title}**\n\n{topic.description}\n\n💡 *Key Takeaways:*\n• Hardware wallets recommended\n• Never share private keys\n• Enable 2FA\n• Verify all transactions"
-            
-        elif query.data == "started":
-            topic = self.education.topics[3]
-            message = f"**{topic.icon} {topic.title}**\n\n{topic.description}\n\n💡 *Key Takeaways:*\n• Research before investing\n• Start small\n• Use reputable platforms\n• Understand the risks"
-        
-        keyboard = [
-            [InlineKeyboardButton("🔗 Blockchain", callback_data="blockchain"),
-             InlineKeyboardButton("💰 Cryptocurrency", callback_data="crypto")],
-            [InlineKeyboardButton("🔒 Security", callback_data="security"),
-             InlineKeyboardButton("🌱 Getting Started", callback_data="started")],
-            [InlineKeyboardButton("📚 All Topics", callback_data="all_topics")]
-        ]
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await query.edit_message_text(
-            message,
-            reply_markup=reply_markup,
-            parse_mode='Markdown'
-        )
-    
-    async def all_topics_handler(self, update: Update, context: CallbackContext) -> None:
-        """Handle 'All Topics' button."""
+        """Handle all button callbacks via the cached view table."""
         query = update.callback_query
-        await query.answer()
-        
-        message = "📚 **Complete Crypto Education Topics**\n\n"
-        
-        for topic in self.education.topics:
-            message += f"{topic.icon} **{topic.title}**\n"
-            message += f"{topic.description}\n\n"
-        
-        keyboard = [
-            [InlineKeyboardButton("🔗 Blockchain", callback_data="blockchain"),
-             InlineKeyboardButton("💰 Cryptocurrency", callback_data="crypto")],
-            [InlineKeyboardButton("🔒 Security", callback_data="security"),
-             InlineKeyboardButton("🌱 Getting Started", callback_data="started")]
-        ]
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await query.edit_message_text(
-            message,
-            reply_markup=reply_markup,
-            parse_mode='Markdown'
-        )
-    
+        # Fire the ack concurrently - the edit below need not wait for it
+        context.application.create_task(query.answer(), update=update)
+
+        view = self._views.get(query.data)
+        if view is None:
+            return
+
+        text, markup = view
+        await self._reply(update, context, text, reply_markup=markup)
+
     def setup_handlers(self, application: Application):
-        """Setup all command handlers."""
-        application.add_handler(CommandHandler("start", self.start))
-        application.add_handler(CommandHandler("topics", self.topics))
-        application.add_handler(CommandHandler("help", self.help_command))
-        
-        # Button handlers
-        application.add_handler(CallbackQueryHandler(self.button_handler, pattern="^(blockchain|crypto|security|started)$"))
-        application.add_handler(CallbackQueryHandler(self.all_topics_handler, pattern="^all_topics$"))
-        
-        # Unknown command handler
-        application.add_handler(MessageHandler(filters.COMMAND, self.unknown))
+        """Register all handlers in one batch.
+
+        The pattern-free CallbackQueryHandler dispatches via self._views;
+        the trailing MessageHandler catches unknown commands.
+        """
+        application.add_handlers([
+            CommandHandler("start", self.start),
+            CommandHandler("topics", self.topics),
+            CommandHandler("help", self.help_command),
+            CallbackQueryHandler(self.button_handler),
+            MessageHandler(filters.COMMAND, self.unknown),
+        ])
     
     async def unknown(self, update: Update, context: CallbackContext) -> None:
         """Handle unknown commands."""
         await update.message.reply_text("Sorry, I didn't understand that command. Try /help to see available commands.")
-    
-    async def set_webhook(self, application: Application):
-        """Set webhook if WEBHOOK_URL is available."""
-        if self.config.WEBHOOK_URL:
-            webhook_url = f"{self.config.WEBHOOK_URL}/webhook"
-            await application.bot.set_webhook(webhook_url)
-            logger.info(f"Webhook set to: {webhook_url}")
-        else:
-            logger.info("Using polling mode (no webhook URL set)")
-    
+
+    def _build_application(self) -> Application:
+        """Build the application with shared defaults and a tuned HTTP pool."""
+        return (
+            Application.builder()
+            .token(self.config.TOKEN)
+            .concurrent_updates(True)
+            .defaults(Defaults(parse_mode=ParseMode.MARKDOWN, block=False))
+            .request(RequestClass(connection_pool_size=64, pool_timeout=10.0))
+            .get_updates_request(RequestClass(connection_pool_size=8))
+            .rate_limiter(AIORateLimiter(max_retries=3))
+            .post_init(_post_init)
+            .build()
+        )
+
     def run_webhook(self):
         """Run bot with webhook (for Render)."""
-        application = Application.builder().token(self.config.TOKEN).build()
+        application = self._build_application()
         self.setup_handlers(application)
         
         # Set webhook on startup
         application.run_webhook(
             listen="0.0.0.0",
             port=self.config.PORT,
-            secret_token='WEBHOOK_SECRET',
-            webhook_url=f"{self.config.WEBHOOK_URL}/webhook" if self.config.WEBHOOK_URL else None
+            secret_token=self.config.WEBHOOK_SECRET,
+            webhook_url=f"{self.config.WEBHOOK_URL}/webhook" if self.config.WEBHOOK_URL else None,
+            allowed_updates=ALLOWED_UPDATES,
+            drop_pending_updates=True
         )
     
     def run_polling(self):
         """Run bot with polling (for local development)."""
-        application = Application.builder().token(self.config.TOKEN).build()
+        application = self._build_application()
         self.setup_handlers(application)
         
         logger.info("Starting bot in polling mode...")
         application.run_polling(
-            allowed_updates=Update.ALL_TYPES,
+            allowed_updates=ALLOWED_UPDATES,
             drop_pending_updates=True
         )
 
 def main():
     """Main entry point."""
+    # uvloop replaces the pure-Python event loop with libuv; a drop-in
+    # win for a network-bound bot (not available on Windows)
+    try:
+        import uvloop
+        uvloop.install()
+        logger.info("Using uvloop event loop")
+    except ImportError:
+        pass
+
     try:
         bot = CryptoEduBot()
         
         # Check if we're on Render (has WEBHOOK_URL)
-        config = BotConfig()
-        
-        if config.WEBHOOK_URL:
+        if BotConfig.WEBHOOK_URL:
             logger.info("Running in webhook mode (Render)")
             bot.run_webhook()
         else:
-            logger.info("Running in polling mode (Local)")
+            logger.warning(
+                "RENDER_EXTERNAL_URL not set - falling back to polling. "
+                "Polling is for local development only; production deploys "
+                "should run in webhook mode."
+            )
             bot.run_polling()
             
     except Exception as e: